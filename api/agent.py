@@ -32,23 +32,22 @@ class handler(BaseHTTPRequestHandler):
             agent = GroundingAgent(api_key=api_key)
             result = agent.process_query(query, use_search_grounding=use_search)
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            self.wfile.write(json.dumps(result).encode('utf-8'))
+            self._send_json(200, result)
         
         except Exception as e:
             self.send_error(500, str(e))
     
-    def do_GET(self):
-        """Health check endpoint"""
-        self.send_response(200)
+    def _send_json(self, status, payload, indent=None):
+        body = json.dumps(payload, indent=indent).encode('utf-8')
+        self.send_response(status)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        """Health check endpoint"""
         response = {
             "status": "ok",
             "message": "Grounding Agent API is running",
@@ -61,7 +60,7 @@ class handler(BaseHTTPRequestHandler):
             }
         }
         
-        self.wfile.write(json.dumps(response, indent=2).encode('utf-8'))
+        self._send_json(200, response, indent=2)
     
     def do_OPTIONS(self):
         """Handle CORS preflight"""
@@ -69,4 +68,5 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
@@ -177,6 +177,9 @@ class GroundingAgent:
             "final_answer": refined_response if refined_response else grounding_result["grounded_response"]
         }
         
+        if "error" in grounding_result:
+            final_result["error"] = grounding_result["error"]
+        
         print("\n" + "="*60)
         print("PROCESSING COMPLETE")
         print("="*60)
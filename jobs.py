@@ -0,0 +1,351 @@
+"""SQLite-backed job queue for long-running agent queries"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import socket
+import sqlite3
+import ipaddress
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+import requests
+
+from grounding_agent import GroundingAgent
+
+
+DEFAULT_JOB_TIMEOUT = 300
+MAX_JOB_TIMEOUT = 3600
+STALE_GRACE = 60
+WEBHOOK_TIMEOUT = 10
+STOP_TIMEOUT = 5
+DEFAULT_RETENTION = 7 * 24 * 3600
+PRUNE_INTERVAL = 60
+SQLITE_INT_MIN, SQLITE_INT_MAX = -2**63, 2**63 - 1
+
+TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    use_search_grounding INTEGER NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    webhook_url TEXT,
+    created_at REAL NOT NULL,
+    deadline REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    owner_pid INTEGER,
+    claim_id TEXT
+)
+"""
+
+INDEX_SCHEMA = """
+DROP INDEX IF EXISTS jobs_pending;
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, deadline);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+ADDED_COLUMNS = (("owner_pid", "INTEGER"), ("claim_id", "TEXT"))
+
+
+def default_agent_factory() -> GroundingAgent:
+    api_key = os.environ.get('GEMINI_API_KEY')
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY not configured")
+    return GroundingAgent(api_key=api_key)
+
+
+def check_webhook_url(url: Any, allow_private: bool = False):
+    if not isinstance(url, str):
+        raise ValueError("'webhook_url' must be an http(s) URL")
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError("'webhook_url' must be an http(s) URL")
+    if allow_private:
+        return
+
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        addresses = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (ValueError, socket.gaierror):
+        raise ValueError("'webhook_url' host could not be resolved")
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split('%')[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError("'webhook_url' must not point to a private, loopback or link-local address")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class JobQueue:
+    def __init__(self, db_path: str, workers: int = 2,
+                 agent_factory: Callable[[], Any] = default_agent_factory,
+                 poll_interval: float = 1.0, retention: float = DEFAULT_RETENTION,
+                 allow_private_webhooks: bool = False):
+        self.db_path = db_path
+        self.workers = workers
+        self.agent_factory = agent_factory
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.allow_private_webhooks = allow_private_webhooks
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._notifier = None
+        self._notifications = queue.Queue()
+        self._running = {}
+        self._running_lock = threading.Lock()
+        self._next_prune = 0.0
+
+        # Schema is created on a throwaway connection so none is shared across fork()
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(TABLE_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, column_type in ADDED_COLUMNS:
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+            conn.executescript(INDEX_SCHEMA)
+        finally:
+            conn.close()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def submit(self, query: str, use_search_grounding: bool = True, priority: int = 0,
+               timeout: float = DEFAULT_JOB_TIMEOUT, webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        if not isinstance(query, str) or not query:
+            raise ValueError("'query' must be a non-empty string")
+        if not isinstance(use_search_grounding, bool):
+            raise ValueError("'use_search_grounding' must be a boolean")
+        if isinstance(priority, bool) or not isinstance(priority, int) or not SQLITE_INT_MIN <= priority <= SQLITE_INT_MAX:
+            raise ValueError("'priority' must be a 64-bit integer")
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout <= MAX_JOB_TIMEOUT:
+            raise ValueError(f"'timeout' must be between 0 and {MAX_JOB_TIMEOUT} seconds")
+        if webhook_url is not None:
+            check_webhook_url(webhook_url, self.allow_private_webhooks)
+
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, query, use_search_grounding, priority, status, webhook_url, created_at, deadline) "
+            "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, query, int(use_search_grounding), priority, webhook_url, now, now + timeout)
+        )
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "query": row["query"],
+            "priority": row["priority"],
+            "created_at": row["created_at"],
+            "deadline": row["deadline"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"]
+        }
+
+    def _sweep(self) -> List[sqlite3.Row]:
+        conn = self._conn()
+        now = time.time()
+        overdue = "(status = 'queued' AND deadline < ?) OR (status = 'running' AND deadline < ?)"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Requeue jobs whose worker process died without finishing or handing them back
+            running = conn.execute(
+                "SELECT id, owner_pid FROM jobs WHERE status = 'running' AND deadline > ?", (now,)
+            ).fetchall()
+            for row in running:
+                if row["owner_pid"] is not None and not _pid_alive(row["owner_pid"]):
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', started_at = NULL, owner_pid = NULL, claim_id = NULL "
+                        "WHERE id = ? AND status = 'running'", (row["id"],)
+                    )
+
+            expired = conn.execute(
+                f"SELECT id, webhook_url FROM jobs WHERE {overdue}", (now, now - STALE_GRACE)
+            ).fetchall()
+            if expired:
+                conn.execute(
+                    f"UPDATE jobs SET status = 'expired', error = 'Deadline exceeded', finished_at = ?, claim_id = NULL "
+                    f"WHERE {overdue}",
+                    (now, now, now - STALE_GRACE)
+                )
+
+            if now >= self._next_prune:
+                self._next_prune = now + PRUNE_INTERVAL
+                conn.execute(
+                    "DELETE FROM jobs WHERE status IN ('succeeded', 'failed', 'expired') AND finished_at < ?",
+                    (now - self.retention,)
+                )
+            conn.execute("COMMIT")
+            return expired
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front so sibling processes never claim the same job
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND deadline > ? "
+                "ORDER BY priority DESC, deadline LIMIT 1", (now,)
+            ).fetchone()
+            job = None
+            if row is not None:
+                job = dict(row, claim_id=uuid.uuid4().hex)
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, owner_pid = ?, claim_id = ? WHERE id = ?",
+                    (now, os.getpid(), job["claim_id"], job["id"])
+                )
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _finish(self, job: Dict[str, Any], result: Optional[Dict[str, Any]], error: Optional[str]) -> bool:
+        now = time.time()
+        if now > job["deadline"]:
+            status = "expired"
+            error = error or "Deadline exceeded"
+        else:
+            status = "failed" if error else "succeeded"
+        # Only the current claim may finish the job; a swept or requeued job is left alone
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, claim_id = NULL "
+            "WHERE id = ? AND claim_id = ? AND status = 'running'",
+            (status, json.dumps(result) if result is not None else None, error, now, job["id"], job["claim_id"])
+        )
+        return cursor.rowcount == 1
+
+    def _notify(self, job_id: str, webhook_url: Optional[str]):
+        if not webhook_url:
+            return
+        try:
+            self._notifications.put((webhook_url, self.get(job_id)))
+        except Exception as e:
+            print(f"Webhook for job {job_id} failed: {e}", file=sys.stderr)
+
+    def _deliver(self):
+        while True:
+            item = self._notifications.get()
+            if item is None:
+                return
+            webhook_url, payload = item
+            try:
+                # Checked again at send time in case the host now resolves elsewhere
+                check_webhook_url(webhook_url, self.allow_private_webhooks)
+                requests.post(webhook_url, json=payload, timeout=WEBHOOK_TIMEOUT, allow_redirects=False)
+            except Exception as e:
+                print(f"Webhook for job {payload['job_id']} failed: {e}", file=sys.stderr)
+
+    def _process(self, job: Dict[str, Any]) -> bool:
+        result, error = None, None
+        try:
+            agent = getattr(self._local, 'agent', None)
+            if agent is None:
+                agent = self._local.agent = self.agent_factory()
+            result = agent.process_query(job["query"], use_search_grounding=bool(job["use_search_grounding"]))
+            # process_query reports Gemini failures in the result instead of raising
+            if isinstance(result, dict) and result.get("error"):
+                error = str(result["error"])
+        except Exception as e:
+            error = str(e)
+        return self._finish(job, result, error)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                for row in self._sweep():
+                    self._notify(row["id"], row["webhook_url"])
+                job = self._claim()
+            except Exception as e:
+                print(f"Job queue error: {e}", file=sys.stderr)
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            with self._running_lock:
+                self._running[job["id"]] = job["claim_id"]
+            finished = False
+            try:
+                finished = self._process(job)
+            except Exception as e:
+                print(f"Job {job['id']} failed: {e}", file=sys.stderr)
+                try:
+                    finished = self._finish(job, None, f"Internal error: {e}")
+                except Exception as db_error:
+                    print(f"Job queue error: {db_error}", file=sys.stderr)
+            finally:
+                with self._running_lock:
+                    self._running.pop(job["id"], None)
+            if finished:
+                self._notify(job["id"], job["webhook_url"])
+
+    def start(self):
+        self._stopping.clear()
+        self._notifier = threading.Thread(target=self._deliver, daemon=True)
+        self._notifier.start()
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        # Gives running jobs a short grace period, then hands unfinished ones back to the queue
+        self._stopping.set()
+        self._wakeup.set()
+        give_up_at = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, give_up_at - time.monotonic()))
+        self._threads = []
+
+        with self._running_lock:
+            unfinished = list(self._running.items())
+        if unfinished:
+            now = time.time()
+            self._conn().executemany(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, owner_pid = NULL, claim_id = NULL "
+                "WHERE id = ? AND claim_id = ? AND status = 'running' AND deadline > ?",
+                [(job_id, claim_id, now) for job_id, claim_id in unfinished]
+            )
+
+        if self._notifier is not None:
+            self._notifications.put(None)
+            self._notifier.join(max(0, give_up_at - time.monotonic()))
+            self._notifier = None
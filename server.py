@@ -0,0 +1,294 @@
+"""Self-hosted multi-worker HTTP server for the Grounding Agent API"""
+
+import os
+import sys
+import json
+import gzip
+import signal
+import socket
+import argparse
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from dotenv import load_dotenv
+
+from api.agent import handler
+from jobs import JobQueue, DEFAULT_JOB_TIMEOUT, DEFAULT_RETENTION
+
+
+DEFAULT_MAX_BODY_BYTES = 64 * 1024
+DEFAULT_KEEP_ALIVE_TIMEOUT = 15
+GZIP_MIN_BYTES = 512
+MIN_WORKER_UPTIME = 5
+RESPAWN_BACKOFF = 1
+MAX_RESPAWN_BACKOFF = 30
+
+
+def accepts_gzip(accept_encoding):
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        if coding.strip().lower() != 'gzip':
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+class SelfHostedHandler(handler):
+    protocol_version = "HTTP/1.1"
+    max_body_bytes = DEFAULT_MAX_BODY_BYTES
+    timeout = DEFAULT_KEEP_ALIVE_TIMEOUT
+    job_queue = None
+
+    def _send_json(self, status, payload, indent=None):
+        body = json.dumps(payload, indent=indent).encode('utf-8')
+        encoding = None
+        if len(body) >= GZIP_MIN_BYTES and accepts_gzip(self.headers.get('Accept-Encoding', '')):
+            body = gzip.compress(body, compresslevel=5)
+            encoding = 'gzip'
+
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def end_headers(self):
+        # Ask keep-alive clients to reconnect elsewhere while this worker drains
+        if self.server.draining and not self.close_connection:
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def _route(self):
+        return self.path.split('?', 1)[0].rstrip('/') or '/'
+
+    def _check_body_length(self):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.send_error(411, "Content-Length required")
+            return False
+        try:
+            length = int(length)
+        except ValueError:
+            self.send_error(400, "Invalid Content-Length")
+            return False
+        if length < 0 or length > self.max_body_bytes:
+            self.send_error(413, f"Request body exceeds {self.max_body_bytes} bytes")
+            return False
+        return True
+
+    def do_POST(self):
+        route = self._route()
+        if route == '/api/agent':
+            if self._check_body_length():
+                super().do_POST()
+        elif route == '/api/jobs' and self.job_queue is not None:
+            if self._check_body_length():
+                self._submit_job()
+        else:
+            self.send_error(404, "Not found")
+
+    def _submit_job(self):
+        try:
+            content_length = int(self.headers['Content-Length'])
+            request_data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+            if not isinstance(request_data, dict):
+                raise ValueError("Request body must be a JSON object")
+
+            job = self.job_queue.submit(
+                request_data.get('query', ''),
+                use_search_grounding=request_data.get('use_search_grounding', True),
+                priority=request_data.get('priority', 0),
+                timeout=request_data.get('timeout', DEFAULT_JOB_TIMEOUT),
+                webhook_url=request_data.get('webhook_url')
+            )
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+
+        job["status_url"] = f"/api/jobs/{job['job_id']}"
+        self._send_json(202, job)
+
+    def do_GET(self):
+        route = self._route()
+        if route == '/health':
+            self._send_json(200, {"status": "ok", "pid": os.getpid()})
+        elif route in ('/', '/api/agent'):
+            super().do_GET()
+        elif route.startswith('/api/jobs/') and self.job_queue is not None:
+            job = self.job_queue.get(route[len('/api/jobs/'):])
+            if job is None:
+                self.send_error(404, "Job not found")
+            else:
+                self._send_json(200, job)
+        else:
+            self.send_error(404, "Not found")
+
+
+class WorkerServer(ThreadingHTTPServer):
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, sock, handler_class):
+        # Serve on an already-bound listening socket shared with sibling workers
+        super().__init__(sock.getsockname()[:2], handler_class, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.draining = False
+
+    def begin_shutdown(self, *_):
+        if not self.draining:
+            self.draining = True
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+def create_listener(host, port, backlog=128):
+    family, _, _, _, address = socket.getaddrinfo(
+        host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+    )[0]
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(address)
+    sock.listen(backlog)
+    return sock
+
+
+def serve_worker(sock, handler_class):
+    server = WorkerServer(sock, handler_class)
+    signal.signal(signal.SIGTERM, server.begin_shutdown)
+    signal.signal(signal.SIGINT, server.begin_shutdown)
+    # Job threads are started per process since threads do not survive fork()
+    if handler_class.job_queue is not None:
+        handler_class.job_queue.start()
+    try:
+        server.serve_forever()
+    finally:
+        # Waits for in-flight requests; idle keep-alive sockets time out
+        server.server_close()
+        if handler_class.job_queue is not None:
+            handler_class.job_queue.stop()
+
+
+def spawn_worker(sock, handler_class):
+    pid = os.fork()
+    if pid == 0:
+        # Drop the parent's supervisor handlers before they can signal siblings
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            serve_worker(sock, handler_class)
+        except Exception as e:
+            print(f"Worker {os.getpid()} crashed: {e}", file=sys.stderr)
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def run(host, port, workers, handler_class=SelfHostedHandler):
+    sock = create_listener(host, port)
+    display_host = f"[{host}]" if ':' in host else host
+    print(f"Grounding Agent API listening on http://{display_host}:{port} with {workers} worker(s)")
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        serve_worker(sock, handler_class)
+        return
+
+    children = {}
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children[spawn_worker(sock, handler_class)] = time.monotonic()
+
+    rapid_exits = 0
+    gave_up = False
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping:
+            continue
+
+        now = time.monotonic()
+        if started is not None and now - started < MIN_WORKER_UPTIME:
+            rapid_exits += 1
+        else:
+            rapid_exits = 0
+        healthy = any(now - t >= MIN_WORKER_UPTIME for t in children.values())
+        if rapid_exits >= workers and not healthy:
+            print("Workers keep exiting right after start, giving up", file=sys.stderr)
+            gave_up = True
+            stop()
+            continue
+
+        print(f"Worker {pid} exited, respawning", file=sys.stderr)
+        if rapid_exits:
+            time.sleep(min(RESPAWN_BACKOFF * rapid_exits, MAX_RESPAWN_BACKOFF))
+        if not stopping:
+            children[spawn_worker(sock, handler_class)] = time.monotonic()
+
+    sock.close()
+    print("Grounding Agent API stopped")
+    if gave_up:
+        sys.exit(1)
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Run the Grounding Agent API server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "3000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES)
+    parser.add_argument("--keep-alive-timeout", type=float, default=DEFAULT_KEEP_ALIVE_TIMEOUT)
+    parser.add_argument("--jobs-db", default=os.getenv("JOBS_DB", "jobs.sqlite3"))
+    parser.add_argument("--job-workers", type=int, default=2, help="Job threads per server worker (0 disables the job API)")
+    parser.add_argument("--job-retention", type=float, default=DEFAULT_RETENTION, help="Seconds to keep finished jobs")
+    parser.add_argument("--allow-private-webhooks", action="store_true", help="Allow webhooks to private and loopback addresses")
+    args = parser.parse_args()
+
+    SelfHostedHandler.max_body_bytes = args.max_body_bytes
+    SelfHostedHandler.timeout = args.keep_alive_timeout
+    if args.job_workers > 0:
+        SelfHostedHandler.job_queue = JobQueue(
+            args.jobs_db,
+            workers=args.job_workers,
+            retention=args.job_retention,
+            allow_private_webhooks=args.allow_private_webhooks
+        )
+
+    run(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
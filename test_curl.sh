@@ -70,6 +70,51 @@ curl -s -X POST $BASE_URL/api/agent \
 echo ""
 echo ""
 
+# Test 8: Submit async job
+echo "[TEST 8] Submit Async Job"
+echo "Query: What is the weather in Paris?"
+echo "─────────────────────────────────────────────────────────"
+JOB_ID=$(curl -s -X POST $BASE_URL/api/jobs \
+  -H "Content-Type: application/json" \
+  -d '{"query":"What is the weather in Paris?","priority":5,"timeout":120}' \
+  | python -c "import sys, json; print(json.load(sys.stdin)['job_id'])")
+echo "Job ID: $JOB_ID"
+echo ""
+echo ""
+
+# Test 9: Poll job status
+echo "[TEST 9] Poll Job Status"
+echo "─────────────────────────────────────────────────────────"
+for i in $(seq 1 30); do
+  STATUS=$(curl -s $BASE_URL/api/jobs/$JOB_ID | python -c "import sys, json; print(json.load(sys.stdin)['status'])")
+  echo "Status: $STATUS"
+  if [ "$STATUS" != "queued" ] && [ "$STATUS" != "running" ]; then
+    break
+  fi
+  sleep 2
+done
+curl -s $BASE_URL/api/jobs/$JOB_ID | python -m json.tool
+echo ""
+echo ""
+
+# Test 10: Invalid priority (expects 400)
+echo "[TEST 10] Invalid Job Priority"
+echo "─────────────────────────────────────────────────────────"
+curl -s -o /dev/null -w "HTTP %{http_code}\n" -X POST $BASE_URL/api/jobs \
+  -H "Content-Type: application/json" \
+  -d '{"query":"Calculate 2 + 2","priority":"high"}'
+echo ""
+echo ""
+
+# Test 11: Non-object body (expects 400)
+echo "[TEST 11] Non-Object Job Body"
+echo "─────────────────────────────────────────────────────────"
+curl -s -o /dev/null -w "HTTP %{http_code}\n" -X POST $BASE_URL/api/jobs \
+  -H "Content-Type: application/json" \
+  -d '["Calculate 2 + 2"]'
+echo ""
+echo ""
+
 echo "═══════════════════════════════════════════════════════════"
 echo "    ALL TESTS COMPLETED!"
 echo "═══════════════════════════════════════════════════════════"